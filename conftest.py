@@ -5,25 +5,31 @@ import pytest
 RESOURCES = Path(__file__).parent / "tests/resources"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def rako_xml() -> str:
-    with (RESOURCES / "rako.xml").open() as f:
-        xml = f.read()
+    return (RESOURCES / "rako.xml").read_text(encoding="utf-8")
 
-    return xml
 
-
-@pytest.fixture
+@pytest.fixture(scope="session")
 def rako_xml2() -> str:
-    with (RESOURCES / "rako2.xml").open() as f:
-        xml = f.read()
-
-    return xml
+    return (RESOURCES / "rako2.xml").read_text(encoding="utf-8")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def rako_xml3() -> str:
-    with (RESOURCES / "rako3.xml").open() as f:
-        xml = f.read()
+    return (RESOURCES / "rako3.xml").read_text(encoding="utf-8")
+
+
+@pytest.fixture(scope="session")
+def rako_xml_bytes() -> bytes:
+    return (RESOURCES / "rako.xml").read_bytes()
+
+
+@pytest.fixture(scope="session")
+def rako_xml2_bytes() -> bytes:
+    return (RESOURCES / "rako2.xml").read_bytes()
+
 
-    return xml
+@pytest.fixture(scope="session")
+def rako_xml3_bytes() -> bytes:
+    return (RESOURCES / "rako3.xml").read_bytes()
@@ -15,24 +15,30 @@ async def listen_for_state_updates(bridge):
             message = await bridge.next_pushed_message(listener)
             if message:
                 # Do stuff with the message
-                _LOGGER.debug(message)
+                _LOGGER.debug("Received message: %s", message)
 
 
-def main():
-    logging.basicConfig(level=logging.DEBUG)
-    loop = asyncio.get_event_loop()
-
+async def _setup() -> Bridge:
     # Find the bridge
-    bridge_desc: BridgeDescription = loop.run_until_complete(asyncio.gather(discover_bridge()))[0]
-    print(bridge_desc)
+    bridge_desc: BridgeDescription = await discover_bridge()
+    _LOGGER.info("Discovered bridge: %s", bridge_desc)
+    return Bridge(**bridge_desc)
+
+
+async def main_async():
+    bridge = await _setup()
 
     # Listen for state updates in the lights
-    bridge = Bridge(**bridge_desc)
-    task: Task = loop.create_task(listen_for_state_updates(bridge))
+    task: Task = asyncio.create_task(listen_for_state_updates(bridge))
 
     # Stop listening
     task.cancel()
 
 
+def main():
+    logging.basicConfig(level=logging.DEBUG)
+    asyncio.run(main_async())
+
+
 if __name__ == "__main__":
     main()
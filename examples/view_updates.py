@@ -1,46 +1,108 @@
-"""Example script demonstrating async file operations and Rako bridge updates.
+"""Example script demonstrating Rako bridge updates.
 
 This script shows how to:
+- Discover the Rako bridge on the network
 - Monitor Rako bridge updates in real-time
-- Write updates to a file asynchronously
-- Read and process the update data
+- Optionally append the updates to a file in batches, by setting the
+  RAKO_UPDATES_FILE environment variable to the file path
 """
 
 import asyncio
 import logging
+import os
+from pathlib import Path
 
 from python_rako import Bridge, BridgeDescription, discover_bridge
 from python_rako.helpers import get_dg_listener
 
 _LOGGER = logging.getLogger(__name__)
 
+# Flush a batch once it holds this many messages or has waited this many seconds
+BATCH_SIZE = 50
+BATCH_TIMEOUT = 0.5
+# Listening pauses while this many messages are waiting to be written
+MAX_QUEUED_UPDATES = 1000
 
-async def listen_for_state_updates(bridge):
+
+async def listen_for_state_updates(bridge, queue: asyncio.Queue | None = None):
     """Listen for state updates worker method."""
     async with get_dg_listener(bridge.port) as listener:
         while True:
             message = await bridge.next_pushed_message(listener)
             if message:
                 # Do stuff with the message
-                _LOGGER.debug(message)
+                _LOGGER.debug("Received message: %s", message)
+                if queue is not None:
+                    await queue.put(message)
 
 
-def main():
-    logging.basicConfig(level=logging.DEBUG)
-    loop = asyncio.get_event_loop()
+def _append_lines(path: Path, lines: list[str]) -> None:
+    with path.open("a", encoding="utf-8") as f:
+        f.writelines(lines)
+
+
+async def write_state_updates(queue: asyncio.Queue, path: Path):
+    """Drain queued updates and append them to path, one write per batch."""
+    loop = asyncio.get_running_loop()
+    batch: list[str] = []
+    write: asyncio.Future | None = None
+    try:
+        while True:
+            batch.append(f"{await queue.get()}\n")
+            deadline = loop.time() + BATCH_TIMEOUT
+            while len(batch) < BATCH_SIZE:
+                try:
+                    message = await asyncio.wait_for(queue.get(), deadline - loop.time())
+                except TimeoutError:
+                    break
+                batch.append(f"{message}\n")
+            # Shield the write so cancellation can't abandon it half way through
+            write = asyncio.ensure_future(asyncio.to_thread(_append_lines, path, batch))
+            batch = []
+            await asyncio.shield(write)
+    finally:
+        # On shutdown, let an in-flight write land, then flush everything left
+        if write is not None and not write.done():
+            await asyncio.wait([write])
+        while not queue.empty():
+            batch.append(f"{queue.get_nowait()}\n")
+        if batch:
+            _append_lines(path, batch)
+
 
+async def _setup() -> Bridge:
     # Find the bridge
-    bridge_desc: BridgeDescription = loop.run_until_complete(asyncio.gather(discover_bridge()))[0]
-    print(bridge_desc)
+    bridge_desc: BridgeDescription = await discover_bridge()
+    _LOGGER.info("Discovered bridge: %s", bridge_desc)
+    return Bridge(**bridge_desc)
+
+
+async def main_async():
+    bridge = await _setup()
 
     # Listen for state updates in the lights
-    bridge = Bridge(**bridge_desc)
-    # Start listening task and store reference to prevent garbage collection
-    task = loop.create_task(listen_for_state_updates(bridge))
+    updates_file = os.environ.get("RAKO_UPDATES_FILE")
+    if not updates_file:
+        await listen_for_state_updates(bridge)
+        return
+
+    # ... and write them out in batches
+    queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_QUEUED_UPDATES)
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(listen_for_state_updates(bridge, queue))
+        tg.create_task(write_state_updates(queue, Path(updates_file)))
+
+
+def main():
+    logging.basicConfig(level=logging.DEBUG)
 
-    loop.run_forever()
-    # Stop listening
-    # task.cancel()
+    # Use uvloop's faster event loop when it is available
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main_async())
+    else:
+        asyncio.run(main_async(), loop_factory=uvloop.new_event_loop)
 
 
 if __name__ == "__main__":
@@ -48,6 +48,12 @@ _LOGGER = logging.getLogger(__name__)
 _XML_PARSE_LOCK = threading.Lock()
 
 
+def _parse_rako_xml(xml: str | bytes) -> dict[str, Any]:
+    """Parse rako.xml into a dict; bytes are handed to expat without re-encoding."""
+    with _XML_PARSE_LOCK:
+        return cast("dict[str, Any]", xmltodict.parse(xml, force_list={"Room"}))
+
+
 class _BridgeCommander:
     def __init__(self, host: str, port: int):
         self.host = host
@@ -172,6 +178,7 @@ class Bridge:
         self.level_cache: LevelCache = LevelCache()
         self.scene_cache: SceneCache = SceneCache()
         self._cached_xml: str | None = None
+        self._cached_xml_dict: dict[str, Any] | None = None
         self._xml_fetch_lock = asyncio.Lock()
         self._last_cache_refresh: float = 0
 
@@ -182,13 +189,32 @@ class Bridge:
     async def get_rako_xml(
         self, session: aiohttp.ClientSession, force_refresh: bool = False
     ) -> str:
+        # Cache hits don't need to wait on the lock
+        if self._cached_xml is not None and not force_refresh:
+            return self._cached_xml
         async with self._xml_fetch_lock:
             if self._cached_xml is None or force_refresh:
                 async with session.get(self._discovery_url) as response:
-                    self._cached_xml = await response.text()
+                    rako_xml = await response.text()
+                # Swap the XML and drop its stale parse together, with no await in
+                # between, so lock-free readers never pair new XML with an old dict
+                self._cached_xml = rako_xml
+                self._cached_xml_dict = None
         assert self._cached_xml is not None
         return self._cached_xml
 
+    async def _get_rako_xml_dict(
+        self, session: aiohttp.ClientSession, force_refresh: bool = False
+    ) -> dict[str, Any]:
+        """Return the parsed rako.xml, parsing it only once per fetch.
+
+        The dict is the shared cache entry and must not be mutated by callers.
+        """
+        rako_xml = await self.get_rako_xml(session, force_refresh)
+        if self._cached_xml_dict is None:
+            self._cached_xml_dict = _parse_rako_xml(rako_xml)
+        return self._cached_xml_dict
+
     async def discover_devices(
         self, session: aiohttp.ClientSession, force_refresh: bool = False
     ) -> tuple[list[RoomLight | ChannelLight], list[RoomVentilation | ChannelVentilation]]:
@@ -196,12 +222,12 @@ class Bridge:
 
         Returns a tuple of (lights, ventilation) to avoid race conditions.
         """
-        rako_xml = await self.get_rako_xml(session, force_refresh)
+        xml_dict = await self._get_rako_xml_dict(session, force_refresh)
 
         lights: list[RoomLight | ChannelLight] = []
         ventilation: list[RoomVentilation | ChannelVentilation] = []
 
-        for device in self.get_devices_from_discovery_xml(rako_xml):
+        for device in self._get_devices_from_xml_dict(xml_dict):
             if isinstance(device, RoomLight | ChannelLight):
                 lights.append(device)
             elif isinstance(device, RoomVentilation | ChannelVentilation):
@@ -229,8 +255,8 @@ class Bridge:
         self, session: aiohttp.ClientSession, force_refresh: bool = False
     ) -> BridgeInfo:
         try:
-            rako_xml = await self.get_rako_xml(session, force_refresh)
-            info = self.get_bridge_info_from_discovery_xml(rako_xml)
+            xml_dict = await self._get_rako_xml_dict(session, force_refresh)
+            info = self._get_bridge_info_from_xml_dict(xml_dict)
         except (KeyError, ValueError) as ex:
             raise RakoBridgeError(f"unsupported bridge: {ex}") from ex
         except aiohttp.ClientError as ex:
@@ -238,9 +264,11 @@ class Bridge:
         return info
 
     @staticmethod
-    def get_bridge_info_from_discovery_xml(xml: str) -> BridgeInfo:
-        with _XML_PARSE_LOCK:
-            xml_dict = xmltodict.parse(xml)
+    def get_bridge_info_from_discovery_xml(xml: str | bytes) -> BridgeInfo:
+        return Bridge._get_bridge_info_from_xml_dict(_parse_rako_xml(xml))
+
+    @staticmethod
+    def _get_bridge_info_from_xml_dict(xml_dict: dict[str, Any]) -> BridgeInfo:
         info = xml_dict["rako"].get("info", {})
         config = xml_dict["rako"].get("config", {})
         return BridgeInfo(
@@ -258,7 +286,13 @@ class Bridge:
 
     @staticmethod
     def get_devices_from_discovery_xml(
-        xml: str, device_types: str | list[str] | None = None
+        xml: str | bytes, device_types: str | list[str] | None = None
+    ) -> Generator[RoomLight | ChannelLight | RoomVentilation | ChannelVentilation, None, None]:
+        yield from Bridge._get_devices_from_xml_dict(_parse_rako_xml(xml), device_types)
+
+    @staticmethod
+    def _get_devices_from_xml_dict(
+        xml_dict: dict[str, Any], device_types: str | list[str] | None = None
     ) -> Generator[RoomLight | ChannelLight | RoomVentilation | ChannelVentilation, None, None]:
         # Handle different input types for backward compatibility
         if device_types is None or device_types == "All":
@@ -268,8 +302,6 @@ class Bridge:
         else:
             target_types = set(device_types)
 
-        with _XML_PARSE_LOCK:
-            xml_dict = xmltodict.parse(xml, force_list={"Room"})
         for room in xml_dict["rako"]["rooms"]["Room"]:
             room_id = int(room["@id"])
             room_type = room.get("Type", "Lights")
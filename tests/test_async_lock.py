@@ -1,6 +1,5 @@
-#!/usr/bin/env python3
 """
-Test script to verify async locking mechanism prevents simultaneous HTTP requests.
+Tests to verify async locking mechanism prevents simultaneous HTTP requests.
 
 This tests the _xml_fetch_lock functionality to ensure that multiple concurrent
 calls to get_rako_xml() on the same bridge instance result in only one actual
@@ -13,12 +12,15 @@ Update the bridge IP and MAC addresses in the test accordingly.
 """
 
 import asyncio
+import functools
 import time
+from collections.abc import AsyncGenerator
 from pathlib import Path
 from unittest.mock import patch
 
 import aiohttp
 import pytest
+import pytest_asyncio
 
 from python_rako.bridge import Bridge
 
@@ -42,14 +44,34 @@ class MockResponse:
         pass
 
 
+class TrackingLock(asyncio.Lock):
+    """asyncio.Lock that counts how often it is acquired."""
+
+    def __init__(self):
+        super().__init__()
+        self.acquire_count = 0
+
+    async def acquire(self) -> bool:
+        self.acquire_count += 1
+        return await super().acquire()
+
+
+@functools.cache
 def load_sample_xml() -> str:
-    """Load sample XML from file."""
+    """Load sample XML from file, reading it only once per test run."""
     sample_file = Path(__file__).parent / "sample_rako.xml"
     return sample_file.read_text(encoding="utf-8")
 
 
-@pytest.mark.asyncio
-async def test_concurrent_get_rako_xml_calls():
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def session() -> AsyncGenerator[aiohttp.ClientSession, None]:
+    """Share one ClientSession across the module; GET requests are patched out."""
+    async with aiohttp.ClientSession() as client_session:
+        yield client_session
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_concurrent_get_rako_xml_calls(session):
     """
     Test that concurrent calls to get_rako_xml() only make one HTTP request
     and return the same XML content without parsing exceptions.
@@ -64,77 +86,148 @@ async def test_concurrent_get_rako_xml_calls():
     # Track HTTP call count
     http_call_count = 0
     call_start_times = []
-    call_end_times = []
+    # MockResponse holds no per-call state, so a single instance serves every request
+    mock_response = MockResponse(expected_xml, delay=0.1)
 
     def create_mock_response():
         nonlocal http_call_count
         http_call_count += 1
-        call_start_times.append(time.time())
+        call_start_times.append(time.perf_counter())
+        return mock_response
 
-        async def delayed_response():
-            await asyncio.sleep(0.1)  # 100ms delay
-            call_end_times.append(time.time())
-            return expected_xml
+    # Mock the HTTP GET request
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        mock_get.side_effect = lambda *args, **kwargs: create_mock_response()
 
-        return MockResponse(expected_xml, delay=0.1)
+        # Make multiple concurrent calls to get_rako_xml
+        num_concurrent_calls = 5
+        start_time = time.perf_counter()
+
+        # Create concurrent tasks
+        tasks = []
+        for i in range(num_concurrent_calls):
+            task = bridge.get_rako_xml(session)
+            tasks.append(task)
+
+        # Execute all tasks concurrently
+        results = await asyncio.gather(*tasks)
+        end_time = time.perf_counter()
+
+        # CRITICAL TEST 1: Only one HTTP request should have been made
+        assert http_call_count == 1, f"Expected 1 HTTP request, but {http_call_count} were made"
+        assert (
+            mock_get.call_count == 1
+        ), f"Expected 1 mock call, but {mock_get.call_count} were made"
+
+        # CRITICAL TEST 2: All results should be identical
+        assert len(results) == num_concurrent_calls, f"Expected {num_concurrent_calls} results"
+        assert all(
+            result is results[0] for result in results
+        ), "All results should be the same cached object"
+
+        # CRITICAL TEST 3: Returned XML should match expected content
+        for result in results:
+            assert result == expected_xml, "Returned XML should match sample XML"
+
+        # CRITICAL TEST 4: XML should contain expected elements (no parsing exceptions)
+        for result in results:
+            assert "<?xml version=" in result, "Should contain XML declaration"
+            assert "<rako>" in result, "Should contain rako root element"
+            assert "<info>" in result, "Should contain info section"
+            assert "<rooms>" in result, "Should contain rooms section"
+            assert "192.168.1.100" in result, "Should contain expected IP"
+            assert "00:11:22:33:44:55" in result, "Should contain expected MAC"
+
+        # CRITICAL TEST 5: Timing should be close to single request time
+        execution_time = end_time - start_time
+        assert execution_time < 0.3, f"Execution took {execution_time:.3f}s, expected < 0.3s"
+
+        print(f"✓ SUCCESS: {num_concurrent_calls} concurrent get_rako_xml() calls")
+        print(f"✓ Only {http_call_count} HTTP request made")
+        print("✓ All results identical and match expected XML")
+        print("✓ No XML parsing exceptions occurred")
+        print(f"✓ Total execution time: {execution_time:.3f}s (expected ~0.1s)")
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize("max_in_flight", [1, 10, 100])
+async def test_bounded_concurrent_get_rako_xml_calls(session, max_in_flight):
+    """
+    Test that the fetch lock still collapses a large burst of callers, bounded
+    by a semaphore, into a single HTTP request.
+    """
+
+    bridge = Bridge(host="192.168.1.100", port=9761, name="RAKOBRIDGE", mac="00:11:22:33:44:55")
+
+    expected_xml = load_sample_xml()
+    http_call_count = 0
+    mock_response = MockResponse(expected_xml, delay=0.05)
+
+    def create_mock_response():
+        nonlocal http_call_count
+        http_call_count += 1
+        return mock_response
 
-    # Mock the HTTP GET request
     with patch("aiohttp.ClientSession.get") as mock_get:
         mock_get.side_effect = lambda *args, **kwargs: create_mock_response()
 
-        async with aiohttp.ClientSession() as session:
-            # Make multiple concurrent calls to get_rako_xml
-            num_concurrent_calls = 5
-            start_time = time.time()
-
-            # Create concurrent tasks
-            tasks = []
-            for i in range(num_concurrent_calls):
-                task = bridge.get_rako_xml(session)
-                tasks.append(task)
-
-            # Execute all tasks concurrently
-            results = await asyncio.gather(*tasks)
-            end_time = time.time()
-
-            # CRITICAL TEST 1: Only one HTTP request should have been made
-            assert http_call_count == 1, f"Expected 1 HTTP request, but {http_call_count} were made"
-            assert (
-                mock_get.call_count == 1
-            ), f"Expected 1 mock call, but {mock_get.call_count} were made"
-
-            # CRITICAL TEST 2: All results should be identical
-            assert len(results) == num_concurrent_calls, f"Expected {num_concurrent_calls} results"
-            assert all(
-                result == results[0] for result in results
-            ), "All results should be identical"
-
-            # CRITICAL TEST 3: Returned XML should match expected content
-            for result in results:
-                assert result == expected_xml, "Returned XML should match sample XML"
-
-            # CRITICAL TEST 4: XML should contain expected elements (no parsing exceptions)
-            for result in results:
-                assert "<?xml version=" in result, "Should contain XML declaration"
-                assert "<rako>" in result, "Should contain rako root element"
-                assert "<info>" in result, "Should contain info section"
-                assert "<rooms>" in result, "Should contain rooms section"
-                assert "192.168.1.100" in result, "Should contain expected IP"
-                assert "00:11:22:33:44:55" in result, "Should contain expected MAC"
-
-            # CRITICAL TEST 5: Timing should be close to single request time
-            execution_time = end_time - start_time
-            assert execution_time < 0.3, f"Execution took {execution_time:.3f}s, expected < 0.3s"
-
-            print(f"✓ SUCCESS: {num_concurrent_calls} concurrent get_rako_xml() calls")
-            print(f"✓ Only {http_call_count} HTTP request made")
-            print("✓ All results identical and match expected XML")
-            print("✓ No XML parsing exceptions occurred")
-            print(f"✓ Total execution time: {execution_time:.3f}s (expected ~0.1s)")
-
-
-@pytest.mark.asyncio
-async def test_concurrent_get_rako_xml_with_force_refresh():
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def make_request():
+            async with semaphore:
+                return await bridge.get_rako_xml(session)
+
+        num_requests = 100
+        results = await asyncio.gather(*(make_request() for _ in range(num_requests)))
+
+        assert http_call_count == 1, f"Expected 1 HTTP request, got {http_call_count}"
+        assert len(results) == num_requests
+        assert all(result == expected_xml for result in results)
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize("primed_by", ["fetch", "seeded_cache"])
+async def test_cached_reads_do_not_contend_on_lock(session, primed_by):
+    """
+    Test that once the XML is cached, the freshness check happens before the
+    fetch lock, so concurrent readers are served without acquiring it.
+    """
+
+    bridge = Bridge(host="192.168.1.100", port=9761, name="RAKOBRIDGE", mac="00:11:22:33:44:55")
+
+    expected_xml = load_sample_xml()
+    mock_response = MockResponse(expected_xml, delay=0.01)
+
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        mock_get.return_value = mock_response
+
+        # Prime the cache, either through a real fetch or by seeding it directly
+        if primed_by == "fetch":
+            await bridge.get_rako_xml(session)
+        else:
+            bridge._cached_xml = expected_xml
+        http_calls_after_priming = mock_get.call_count
+
+        bridge._xml_fetch_lock = TrackingLock()
+
+        num_concurrent_calls = 1000
+        start_time = time.perf_counter()
+        results = await asyncio.gather(
+            *(bridge.get_rako_xml(session) for _ in range(num_concurrent_calls))
+        )
+        execution_time = time.perf_counter() - start_time
+
+        acquire_count = bridge._xml_fetch_lock.acquire_count
+        assert acquire_count == 0, f"Cache hits acquired the lock {acquire_count} times"
+        assert not bridge._xml_fetch_lock.locked()
+        assert mock_get.call_count == http_calls_after_priming, "Cache hits should not make HTTP requests"
+        assert len(results) == num_concurrent_calls
+        assert all(result == expected_xml for result in results)
+        assert execution_time < 0.5, f"Cached reads took {execution_time:.3f}s, expected < 0.5s"
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_concurrent_get_rako_xml_with_force_refresh(session):
     """
     Test that force_refresh parameter works correctly with concurrent calls.
     """
@@ -156,45 +249,44 @@ async def test_concurrent_get_rako_xml_with_force_refresh():
     with patch("aiohttp.ClientSession.get") as mock_get:
         mock_get.side_effect = lambda *args, **kwargs: create_mock_response()
 
-        async with aiohttp.ClientSession() as session:
-            # First call - should make HTTP request and cache result
-            result1 = await bridge.get_rako_xml(session)
-            assert http_call_count == 1
-            assert "<version>2.5.1 WTC</version>" in result1
+        # First call - should make HTTP request and cache result
+        result1 = await bridge.get_rako_xml(session)
+        assert http_call_count == 1
+        assert "<version>2.5.1 WTC</version>" in result1
 
-            # Second call without force_refresh - should use cached result
-            result2 = await bridge.get_rako_xml(session)
-            assert http_call_count == 1  # No new HTTP request
-            assert result2 == result1  # Same cached result
+        # Second call without force_refresh - should use cached result
+        result2 = await bridge.get_rako_xml(session)
+        assert http_call_count == 1  # No new HTTP request
+        assert result2 is result1  # Same cached result
 
-            # Multiple concurrent calls with force_refresh=True
-            # Create tasks simultaneously to ensure they are truly concurrent
-            tasks = []
-            for _ in range(3):
-                tasks.append(bridge.get_rako_xml(session, force_refresh=True))
+        # Multiple concurrent calls with force_refresh=True
+        # Create tasks simultaneously to ensure they are truly concurrent
+        tasks = []
+        for _ in range(3):
+            tasks.append(bridge.get_rako_xml(session, force_refresh=True))
 
-            results = await asyncio.gather(*tasks)
+        results = await asyncio.gather(*tasks)
 
-            # The current implementation will make one request per force_refresh=True call
-            # This is because each call sees force_refresh=True individually
-            # In a real scenario, users typically wouldn't make concurrent force_refresh calls
-            assert http_call_count >= 2, f"Expected at least 2 HTTP requests, got {http_call_count}"
+        # The current implementation will make one request per force_refresh=True call
+        # This is because each call sees force_refresh=True individually
+        # In a real scenario, users typically wouldn't make concurrent force_refresh calls
+        assert http_call_count >= 2, f"Expected at least 2 HTTP requests, got {http_call_count}"
 
-            # All force_refresh results should be identical if they hit the same cache
-            # But they might be different versions if each made its own request
-            print(f"Force refresh made {http_call_count - 1} additional requests")
+        # All force_refresh results should be identical if they hit the same cache
+        # But they might be different versions if each made its own request
+        print(f"Force refresh made {http_call_count - 1} additional requests")
 
-            # At least one result should be different from original cached result
-            assert any(
-                result != result1 for result in results
-            ), "At least one force refresh should return different result"
+        # At least one result should be different from original cached result
+        assert any(
+            result != result1 for result in results
+        ), "At least one force refresh should return different result"
 
-            print("✓ SUCCESS: Force refresh with concurrent calls handled correctly")
-            print(f"✓ Total HTTP requests: {http_call_count} (expected 2)")
+        print("✓ SUCCESS: Force refresh with concurrent calls handled correctly")
+        print(f"✓ Total HTTP requests: {http_call_count} (expected 2)")
 
 
-@pytest.mark.asyncio
-async def test_concurrent_get_rako_xml_different_bridges():
+@pytest.mark.asyncio(loop_scope="module")
+async def test_concurrent_get_rako_xml_different_bridges(session):
     """
     Test that different bridge instances don't share locks.
     """
@@ -219,28 +311,27 @@ async def test_concurrent_get_rako_xml_different_bridges():
     with patch("aiohttp.ClientSession.get") as mock_get:
         mock_get.side_effect = lambda *args, **kwargs: create_mock_response()
 
-        async with aiohttp.ClientSession() as session:
-            # Concurrent calls to different bridge instances
-            tasks = [bridge1.get_rako_xml(session), bridge2.get_rako_xml(session)]
+        # Concurrent calls to different bridge instances
+        tasks = [bridge1.get_rako_xml(session), bridge2.get_rako_xml(session)]
 
-            results = await asyncio.gather(*tasks)
+        results = await asyncio.gather(*tasks)
 
-            # Should make 2 HTTP requests (one per bridge instance)
-            assert http_call_count == 2, f"Expected 2 HTTP requests, got {http_call_count}"
+        # Should make 2 HTTP requests (one per bridge instance)
+        assert http_call_count == 2, f"Expected 2 HTTP requests, got {http_call_count}"
 
-            # Results should be different (different bridge responses)
-            assert results[0] != results[1], "Different bridges should return different results"
+        # Results should be different (different bridge responses)
+        assert results[0] != results[1], "Different bridges should return different results"
 
-            # Verify each result contains expected bridge-specific content
-            assert "192.168.1.100" in results[0]
-            assert "192.168.1.101" in results[1]
+        # Verify each result contains expected bridge-specific content
+        assert "192.168.1.100" in results[0]
+        assert "192.168.1.101" in results[1]
 
-            print("✓ SUCCESS: Different bridge instances handled independently")
-            print(f"✓ HTTP requests made: {http_call_count} (expected 2)")
+        print("✓ SUCCESS: Different bridge instances handled independently")
+        print(f"✓ HTTP requests made: {http_call_count} (expected 2)")
 
 
-@pytest.mark.asyncio
-async def test_get_rako_xml_parsing_safety():
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_rako_xml_parsing_safety(session):
     """
     Test that get_rako_xml doesn't cause XML parsing exceptions with concurrent access.
     """
@@ -249,43 +340,106 @@ async def test_get_rako_xml_parsing_safety():
 
     expected_xml = load_sample_xml()
     http_call_count = 0
+    mock_response = MockResponse(expected_xml, delay=0.1)
 
     def create_mock_response():
         nonlocal http_call_count
         http_call_count += 1
-        return MockResponse(expected_xml, delay=0.1)
+        return mock_response
 
     with patch("aiohttp.ClientSession.get") as mock_get:
         mock_get.side_effect = lambda *args, **kwargs: create_mock_response()
 
-        async with aiohttp.ClientSession() as session:
-            # Test concurrent get_rako_xml calls don't interfere with XML parsing
-            async def get_xml_and_parse():
-                xml = await bridge.get_rako_xml(session)
-                # Verify XML can be parsed without exceptions
-                assert "<?xml" in xml
-                assert "<rako>" in xml
-                assert "</rako>" in xml
-                return xml
-
-            # Make multiple concurrent calls
-            tasks = [get_xml_and_parse() for _ in range(10)]
-            results = await asyncio.gather(*tasks)
-
-            # Should only make one HTTP request
-            assert http_call_count == 1, f"Expected 1 HTTP request, got {http_call_count}"
-
-            # All results should be identical and valid XML
-            assert all(result == results[0] for result in results)
-            assert all(result == expected_xml for result in results)
-
-            print("✓ SUCCESS: Concurrent XML parsing handled safely")
-            print(f"✓ No XML parsing exceptions with {len(tasks)} concurrent calls")
-
-
-if __name__ == "__main__":
-    asyncio.run(test_concurrent_get_rako_xml_calls())
-    asyncio.run(test_concurrent_get_rako_xml_with_force_refresh())
-    asyncio.run(test_concurrent_get_rako_xml_different_bridges())
-    asyncio.run(test_get_rako_xml_parsing_safety())
-    print("\n=== All Async Lock Tests Passed! ===")
+        # Test concurrent get_rako_xml calls don't interfere with XML parsing
+        async def get_xml_and_parse():
+            xml = await bridge.get_rako_xml(session)
+            # Verify XML can be parsed without exceptions
+            assert "<?xml" in xml
+            assert "<rako>" in xml
+            assert "</rako>" in xml
+            return xml
+
+        # Make multiple concurrent calls
+        tasks = [get_xml_and_parse() for _ in range(10)]
+        results = await asyncio.gather(*tasks)
+
+        # Should only make one HTTP request
+        assert http_call_count == 1, f"Expected 1 HTTP request, got {http_call_count}"
+
+        # All results should be identical and valid XML
+        assert all(result is results[0] for result in results), "cache must return same object"
+        assert all(result == expected_xml for result in results)
+
+        print("✓ SUCCESS: Concurrent XML parsing handled safely")
+        print(f"✓ No XML parsing exceptions with {len(tasks)} concurrent calls")
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_rako_xml_dict_parses_once_per_fetch(session):
+    """
+    Test that the parsed XML is cached alongside the raw XML and only
+    re-parsed after a refresh.
+    """
+
+    bridge = Bridge(host="192.168.1.100", port=9761, name="RAKOBRIDGE", mac="00:11:22:33:44:55")
+
+    expected_xml = load_sample_xml()
+    mock_response = MockResponse(expected_xml, delay=0.05)
+
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        mock_get.return_value = mock_response
+
+        results = await asyncio.gather(*(bridge._get_rako_xml_dict(session) for _ in range(10)))
+
+        assert mock_get.call_count == 1
+        assert bridge._cached_xml_dict is not None
+        assert all(result is results[0] for result in results), "Parsed XML should be cached"
+        assert results[0]["rako"]["info"]["hostIP"] == "192.168.1.100"
+
+        # Discovery reuses the cached parse
+        lights, _ = await bridge.discover_devices(session)
+        assert lights
+        assert bridge._cached_xml_dict is results[0]
+
+        refreshed = await bridge._get_rako_xml_dict(session, force_refresh=True)
+        assert mock_get.call_count == 2
+        assert refreshed is not results[0], "A refresh should re-parse the XML"
+        assert refreshed == results[0]
+
+
+class SlowExitResponse(MockResponse):
+    """Mock response whose __aexit__ yields to the event loop, like aiohttp's."""
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_rako_xml_dict_not_stale_during_refresh(session):
+    """
+    Test that a reader running while a refresh releases its response never
+    gets the new XML paired with the previous parse.
+    """
+
+    bridge = Bridge(host="192.168.1.100", port=9761, name="RAKOBRIDGE", mac="00:11:22:33:44:55")
+
+    expected_xml = load_sample_xml()
+    old_xml = expected_xml.replace("<version>2.5.0 WTC</version>", "<version>9.9.1</version>")
+    new_xml = expected_xml.replace("<version>2.5.0 WTC</version>", "<version>9.9.2</version>")
+
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        mock_get.return_value = MockResponse(old_xml, delay=0)
+        old_dict = await bridge._get_rako_xml_dict(session)
+        assert old_dict["rako"]["info"]["version"] == "9.9.1"
+
+        mock_get.return_value = SlowExitResponse(new_xml, delay=0)
+        refresh = asyncio.create_task(bridge.get_rako_xml(session, force_refresh=True))
+        # Let the refresh read the new body and block in __aexit__
+        await asyncio.sleep(0.01)
+
+        rako_xml = await bridge.get_rako_xml(session)
+        xml_dict = await bridge._get_rako_xml_dict(session)
+        await refresh
+
+        version = xml_dict["rako"]["info"]["version"]
+        assert f"<version>{version}</version>" in rako_xml
@@ -1,3 +1,5 @@
+import pytest
+
 from python_rako.bridge import Bridge
 from python_rako.model import (
     BridgeInfo,
@@ -201,3 +203,24 @@ def test_get_devices_all_parameter_variants(rako_xml3):
     # Should contain both lights and ventilation
     assert any(isinstance(dev, (RoomLight, ChannelLight)) for dev in all_devices_none)
     assert any(isinstance(dev, (RoomVentilation, ChannelVentilation)) for dev in all_devices_none)
+
+
+@pytest.mark.parametrize(
+    ("str_fixture", "bytes_fixture"),
+    [
+        ("rako_xml", "rako_xml_bytes"),
+        ("rako_xml2", "rako_xml2_bytes"),
+        ("rako_xml3", "rako_xml3_bytes"),
+    ],
+)
+def test_discovery_xml_accepts_bytes(request, str_fixture, bytes_fixture):
+    """Test that the static parsers give the same result for str and bytes"""
+    xml = request.getfixturevalue(str_fixture)
+    xml_bytes = request.getfixturevalue(bytes_fixture)
+
+    assert Bridge.get_bridge_info_from_discovery_xml(
+        xml_bytes
+    ) == Bridge.get_bridge_info_from_discovery_xml(xml)
+    assert list(Bridge.get_devices_from_discovery_xml(xml_bytes)) == list(
+        Bridge.get_devices_from_discovery_xml(xml)
+    )